@@ -1,33 +1,159 @@
+import functools
 import logging
 import os
-from dataclasses import dataclass
+import re
 import time
-from typing import Any, List, Optional
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
 import sys
 import asyncio
 
+import anyio
+import httpx
 from dotenv import load_dotenv
 from llama_index.core.agent import ReActAgent
 from llama_index.core.tools import FunctionTool
 from llama_index.llms.openai_like import OpenAILike
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from openai import AsyncOpenAI
+
+from cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 load_dotenv("/vault-secrets/.env", override=True)
 
+# LLM and cache settings, read once at import
+LLM_MODEL_ENDPOINT = os.environ.get("LLM_MODEL_HOST") or os.environ.get("LLM_BASE_URL", "")
+LLM_MODEL_NAME = os.environ.get("LLM_MODEL_NAME", "")
+LLM_TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.7"))
+# The only exact-match cache of tool results; the MCP server adds just its
+# statistics cache (STATS_CACHE_TTL) underneath
+TOOL_RESULT_CACHE_TTL = float(os.environ.get("TOOL_RESULT_CACHE_TTL", "60"))
 
-@dataclass
-class Messages:
-    actor: str
-    payload: str
+# Kept byte-identical across agents so providers can reuse the cached prompt prefix
+AGENT_SYSTEM_PROMPT = """You are a CVE security analyst assistant. You have access to various tools to query a CVE vulnerability database.
 
+When the user asks about CVEs:
+1. Use the available tools to query the database
+2. Present results clearly and concisely
+3. Highlight critical information like severity, CVSS scores, and exploit status
 
-USER = "user"
-ASSISTANT = "ai"
-MESSAGES = "messages"
+Available tools allow you to:
+- query_cve_by_severity: Query CVEs by severity level (CRITICAL, HIGH, MEDIUM, LOW)
+- query_cve_by_number: Query specific CVE by its number
+- query_cve_by_cvss_range: Query CVEs within a CVSS score range
+- query_cve_by_keyword: Search CVEs by keywords
+- query_cve_by_product: Search CVEs affecting specific products
+- query_cve_with_exploit: Find CVEs with known exploits
+- query_cve_by_cisa_key: Find CVEs in CISA KEV catalog
+- get_cve_statistics: Get statistical summaries
+- query_cve_by_attack_type: Query by attack vector or complexity
+- query_recent_cves: Get recently published CVEs
+
+Always use the tools to get accurate data from the database."""
+
+# CVE number pattern (CVE-YYYY-NNNNN)
+CVE_NUMBER_RE = re.compile(r'cve-\d{4}-\d{4,7}')
+
+# Words ignored when picking a keyword for the fallback search
+KEYWORD_STOPWORDS = frozenset({'find', 'show', 'give', 'list', 'query', 'search', 'with', 'that', 'have'})
+
+DEFAULT_RESULT_LIMIT = 5
+
+# Word tokens used for routing (hyphenated terms like "high-severity" split apart)
+QUERY_TOKEN_RE = re.compile(r'\w+')
+
+# Ordered (stem groups, tool name, tool kwargs) routing table; a route matches when
+# every group has a stem that starts some query word ("kevs", "highest" and
+# "exploitation" all match), and the first match wins
+QUERY_ROUTES: Tuple[Tuple[Tuple[Tuple[str, ...], ...], str, Dict[str, Any]], ...] = (
+    ((("statistic", "summary", "overview"),),
+     "get_cve_statistics", {}),
+    ((("critical",),),
+     "query_cve_by_severity", {"severity": "CRITICAL", "limit": DEFAULT_RESULT_LIMIT}),
+    ((("high",), ("severity",)),
+     "query_cve_by_severity", {"severity": "HIGH", "limit": DEFAULT_RESULT_LIMIT}),
+    ((("exploit",),),
+     "query_cve_with_exploit", {"limit": DEFAULT_RESULT_LIMIT}),
+    ((("recent", "latest"),),
+     "query_recent_cves", {"limit": DEFAULT_RESULT_LIMIT}),
+    ((("cisa", "kev"),),
+     "query_cve_by_cisa_key", {"limit": DEFAULT_RESULT_LIMIT}),
+)
+
+def route_query(query_lower: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Pick the MCP tool and arguments for a lower-cased user query.
+
+    Args:
+        query_lower: The user query, already lower-cased
+
+    Returns:
+        (tool name, tool kwargs), or None if no tool applies
+    """
+    cve_match = CVE_NUMBER_RE.search(query_lower)
+    if cve_match:
+        return "query_cve_by_number", {"cve_number": cve_match.group(0).upper()}
+
+    tokens = frozenset(QUERY_TOKEN_RE.findall(query_lower))
+    for stem_groups, tool_name, tool_kwargs in QUERY_ROUTES:
+        if all(any(token.startswith(stems) for token in tokens) for stems in stem_groups):
+            return tool_name, tool_kwargs
+
+    # Try keyword search as fallback
+    for word in query_lower.split():
+        if len(word) > 3 and word not in KEYWORD_STOPWORDS:
+            return "query_cve_by_keyword", {"keyword": word, "limit": DEFAULT_RESULT_LIMIT}
+
+    return None
+
+
+@functools.lru_cache(maxsize=4)
+def get_openai_client(base_url: str, timeout: float) -> AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client for an endpoint.
+
+    The client owns a keep-alive httpx pool, so sharing it across agents keeps
+    LLM connections warm instead of rebuilding the pool per setup_agent.
+    """
+    return AsyncOpenAI(
+        api_key="sk-111111111111111111111111111111111111111111111111",  # Properly formatted dummy key
+        base_url=base_url,
+        timeout=timeout,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=timeout,
+        ),
+    )
+
+
+# Event loops already patched by nest_asyncio for synchronous tool calls
+_nest_patched_loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+
+def _run_coroutine_sync(loop: asyncio.AbstractEventLoop, coro_fn: Callable[..., Any], **kwargs) -> Any:
+    """
+    Run coro_fn(**kwargs) to completion on loop from synchronous code.
+
+    nest_asyncio is applied at most once per loop so re-entrant calls from
+    inside a running loop work without re-patching on every call.
+    """
+    if loop not in _nest_patched_loops:
+        import nest_asyncio
+        nest_asyncio.apply(loop)
+        _nest_patched_loops.add(loop)
+    return loop.run_until_complete(coro_fn(**kwargs))
+
+
+def _warn_unclosed_client(client_id: int) -> None:
+    """Report an MCPClient that was garbage-collected with its session open."""
+    logger.warning(
+        "MCPClient %#x was not closed; use 'async with MCPClient()' or await cleanup()",
+        client_id,
+    )
 
 
 class MCPClient:
@@ -38,29 +164,46 @@ class MCPClient:
     initializing the tools and LLM (Language Learning Model),
     and processing user queries using the configured agent.
 
+    Use it as an async context manager so the MCP server subprocess is shut
+    down deterministically:
+
+        async with MCPClient() as client:
+            response = await client.process_query("...")
+
     Attributes:
         model_endpoint (str): The endpoint for the LLM model.
         model_name (str): The name of the LLM model.
         temperature (float): The temperature setting for the LLM model.
         agent (ReActAgent): The agent used to process queries.
-        tools (list): A list of tools fetched from the MCP server.
+        tools (tuple): The tools fetched from the MCP server.
         mcp_session (ClientSession): Active MCP session.
     """
 
     def __init__(self) -> None:
         """
-        Initializes the MCPClient with default settings and environment vars.
+        Initializes the MCPClient with default settings from the environment.
         """
-        self.model_endpoint = os.environ.get("LLM_MODEL_HOST") or os.environ.get("LLM_BASE_URL", "")
-        self.model_name = os.environ.get("LLM_MODEL_NAME", "")
-        self.temperature = float(os.environ.get("LLM_TEMPERATURE", "0.7"))
+        self.model_endpoint = LLM_MODEL_ENDPOINT
+        self.model_name = LLM_MODEL_NAME
+        self.temperature = LLM_TEMPERATURE
         self.agent: Optional[ReActAgent] = None
-        self.tools: List[FunctionTool] = []
+        self.tools: Tuple[FunctionTool, ...] = ()
+        self._tools_by_name: Dict[str, FunctionTool] = {}
         self.mcp_session: Optional[ClientSession] = None
         self.exit_stack = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._setup_lock = asyncio.Lock()
+        self._reconnect_lock = asyncio.Lock()
+        self.tool_result_cache = TTLCache(
+            maxsize=128,
+            ttl=TOOL_RESULT_CACHE_TTL,
+        )
 
     async def _connect_to_mcp_server(self) -> ClientSession:
-        """Connect to the local MCP server via stdio."""
+        """Connect to the local MCP server via stdio, reusing a live session."""
+        if self.exit_stack is not None and self.mcp_session is not None:
+            return self.mcp_session
+
         try:
             # Get the absolute path to mcp_server.py
             server_script = os.path.join(os.getcwd(), "mcp_server.py")
@@ -94,6 +237,10 @@ class MCPClient:
             # Initialize the session
             await self.mcp_session.initialize()
 
+            # Only warns; closing the session needs the loop it was opened on
+            if self._finalizer is None or not self._finalizer.alive:
+                self._finalizer = weakref.finalize(self, _warn_unclosed_client, id(self))
+
             logger.info("✓ MCP session initialized successfully")
             return self.mcp_session
 
@@ -101,7 +248,25 @@ class MCPClient:
             logger.error(f"Failed to connect to MCP server: {str(e)}")
             raise
 
-    async def _load_mcp_tools(self) -> List[FunctionTool]:
+    async def _reconnect_mcp_server(self, stale_session: Optional[ClientSession]) -> None:
+        """Replace a dead MCP session with a freshly spawned one."""
+        async with self._reconnect_lock:
+            # Another caller may already have reconnected while we waited
+            if self.mcp_session is not stale_session:
+                return
+
+            logger.warning("MCP session lost, reconnecting...")
+            if self.exit_stack:
+                try:
+                    await self.exit_stack.aclose()
+                except Exception as e:
+                    logger.debug(f"Ignoring error while closing dead MCP session: {str(e)}")
+            self.exit_stack = None
+            self.mcp_session = None
+
+            await self._connect_to_mcp_server()
+
+    async def _load_mcp_tools(self) -> Tuple[FunctionTool, ...]:
         """Load tools from MCP server and convert to LlamaIndex FunctionTools."""
         if not self.mcp_session:
             raise RuntimeError("MCP session not initialized")
@@ -113,12 +278,9 @@ class MCPClient:
 
             logger.info(f"Found {len(response.tools)} tools from MCP server")
 
-            llama_tools = []
-            for tool in response.tools:
-                # Create a LlamaIndex FunctionTool for each MCP tool
-                llama_tool = self._create_llama_tool(tool)
-                llama_tools.append(llama_tool)
-                logger.info(f"  ✓ Loaded: {tool.name}")
+            # Create a LlamaIndex FunctionTool for each MCP tool
+            llama_tools = tuple(self._create_llama_tool(tool) for tool in response.tools)
+            logger.info("  ✓ Loaded: %s", ", ".join(tool.name for tool in response.tools))
 
             return llama_tools
 
@@ -138,45 +300,58 @@ class MCPClient:
                 if not self.mcp_session:
                     return "Error: MCP session not available"
 
-                # Call the MCP tool
-                result = await self.mcp_session.call_tool(tool_name, arguments=kwargs)
+                # Repeated calls with the same arguments are served from the result cache
+                try:
+                    cache_key = (tool_name, tuple(sorted(kwargs.items())))
+                    hash(cache_key)
+                except TypeError:
+                    cache_key = None
+                if cache_key is not None:
+                    cached = self.tool_result_cache.get(cache_key)
+                    if cached is not None:
+                        return cached
+
+                # Call the MCP tool, respawning the server once if it has died
+                session = self.mcp_session
+                try:
+                    result = await session.call_tool(tool_name, arguments=kwargs)
+                except (anyio.ClosedResourceError, anyio.BrokenResourceError, ConnectionError):
+                    await self._reconnect_mcp_server(session)
+                    result = await self.mcp_session.call_tool(tool_name, arguments=kwargs)
 
                 # Extract text content from result
-                if hasattr(result, 'content') and result.content:
-                    text_parts = []
-                    for content_item in result.content:
-                        if hasattr(content_item, 'text'):
-                            text_parts.append(content_item.text)
-                    return "\n".join(text_parts) if text_parts else str(result)
+                content = getattr(result, 'content', None)
+                text = "\n".join(
+                    item.text for item in content or () if getattr(item, 'text', None) is not None
+                ) or str(result)
 
-                return str(result)
+                if cache_key is not None and not text.startswith("Error"):
+                    self.tool_result_cache.set(cache_key, text)
+                return text
 
             except Exception as e:
                 logger.error(f"Error calling MCP tool {tool_name}: {str(e)}")
                 return f"Error: {str(e)}"
 
+        # The MCP session is bound to the loop that loads the tools, so sync
+        # callers must drive that same loop; pick it once here rather than per call
+        session_loop = asyncio.get_running_loop()
+
         # Create sync wrapper for LlamaIndex
         def sync_wrapper(**kwargs) -> str:
             """Sync wrapper that runs the async function."""
             try:
-                # Get or create event loop
-                try:
-                    loop = asyncio.get_running_loop()
-                    # If we're in a running loop, use nest_asyncio
-                    import nest_asyncio
-                    nest_asyncio.apply()
-                    return loop.run_until_complete(tool_function(**kwargs))
-                except RuntimeError:
-                    # No running loop, create new one
-                    return asyncio.run(tool_function(**kwargs))
+                return _run_coroutine_sync(session_loop, tool_function, **kwargs)
             except Exception as e:
                 logger.error(f"Error in sync wrapper for {tool_name}: {str(e)}")
                 return f"Error: {str(e)}"
 
         # Create the FunctionTool - don't pass fn_schema as LlamaIndex will infer it
-        # The MCP inputSchema is already a dict and LlamaIndex expects a Pydantic model
+        # The MCP inputSchema is already a dict and LlamaIndex expects a Pydantic model.
+        # async_fn lets async callers (acall) await the MCP call directly.
         return FunctionTool.from_defaults(
             fn=sync_wrapper,
+            async_fn=tool_function,
             name=tool_name,
             description=tool_description,
         )
@@ -189,91 +364,71 @@ class MCPClient:
         if self.agent is not None:
             return
 
-        start_time = time.perf_counter()
-        try:
-            logger.info("Setting up MCP agent...")
+        # Concurrent first callers share one connection instead of each spawning a server
+        async with self._setup_lock:
+            if self.agent is not None:
+                return
 
-            # Connect to MCP server and load tools
-            if not self.tools:
-                logger.info("Connecting to MCP server...")
-                await self._connect_to_mcp_server()
+            start_time = time.perf_counter()
+            try:
+                logger.info("Setting up MCP agent...")
 
-                logger.info("Loading tools from MCP server...")
-                self.tools = await self._load_mcp_tools()
+                # Connect to MCP server and load tools
+                if not self.tools:
+                    logger.info("Connecting to MCP server...")
+                    await self._connect_to_mcp_server()
 
-                logger.info(f"✓ Loaded {len(self.tools)} tools successfully")
+                    logger.info("Loading tools from MCP server...")
+                    self.tools = await self._load_mcp_tools()
+                    self._tools_by_name = {tool.metadata.name: tool for tool in self.tools}
 
-            # Initialize LLM
-            llm_start = time.perf_counter()
-            logger.info(f"Initializing LLM with model {self.model_name}...")
+                    logger.info(f"✓ Loaded {len(self.tools)} tools successfully")
 
-            if not self.model_endpoint:
-                raise ValueError("LLM endpoint not configured. Set LLM_MODEL_HOST or LLM_BASE_URL in .env")
+                # Initialize LLM
+                llm_start = time.perf_counter()
+                logger.info(f"Initializing LLM with model {self.model_name}...")
 
-            logger.info(f"Connecting to LLM at: {self.model_endpoint}")
+                if not self.model_endpoint:
+                    raise ValueError("LLM endpoint not configured. Set LLM_MODEL_HOST or LLM_BASE_URL in .env")
 
-            # Clear OpenAI environment variables to avoid conflicts
-            os.environ.pop("OPENAI_API_KEY", None)
-            os.environ.pop("OPENAI_BASE_URL", None)
+                logger.info(f"Connecting to LLM at: {self.model_endpoint}")
 
-            # Create a custom OpenAI client for local models
-            from openai import AsyncOpenAI
+                # Clear OpenAI environment variables to avoid conflicts
+                os.environ.pop("OPENAI_API_KEY", None)
+                os.environ.pop("OPENAI_BASE_URL", None)
 
-            custom_client = AsyncOpenAI(
-                api_key="sk-111111111111111111111111111111111111111111111111",  # Properly formatted dummy key
-                base_url=self.model_endpoint,
-                timeout=120.0,
-            )
+                # Shared OpenAI client for local models
+                custom_client = get_openai_client(self.model_endpoint, 120.0)
 
-            llm = OpenAILike(
-                model=self.model_name,
-                max_tokens=4096,
-                is_chat_model=True,
-                is_function_calling_model=False,  # Ollama llama3.1 doesn't support native function calling
-                temperature=self.temperature,
-                async_openai_client=custom_client,  # Pass our custom client
-            )
+                llm = OpenAILike(
+                    model=self.model_name,
+                    max_tokens=4096,
+                    is_chat_model=True,
+                    is_function_calling_model=False,  # Ollama llama3.1 doesn't support native function calling
+                    temperature=self.temperature,
+                    async_openai_client=custom_client,  # Pass our custom client
+                )
 
-            llm_end = time.perf_counter()
-            logger.info(f"LLM initialized in {(llm_end - llm_start):.2f}s")
+                llm_end = time.perf_counter()
+                logger.info(f"LLM initialized in {(llm_end - llm_start):.2f}s")
 
-            # Create ReActAgent with tools - it will use text-based reasoning instead of function calling
-            system_prompt = """You are a CVE security analyst assistant. You have access to various tools to query a CVE vulnerability database.
+                # Create ReActAgent with tools - it will use text-based reasoning instead of function calling
+                self.agent = ReActAgent(
+                    tools=list(self.tools),
+                    llm=llm,
+                    system_prompt=AGENT_SYSTEM_PROMPT,
+                    verbose=True,
+                    max_iterations=10,
+                )
 
-When the user asks about CVEs:
-1. Use the available tools to query the database
-2. Present results clearly and concisely
-3. Highlight critical information like severity, CVSS scores, and exploit status
+                logger.info("✓ Agent setup completed successfully!")
 
-Available tools allow you to:
-- query_cve_by_severity: Query CVEs by severity level (CRITICAL, HIGH, MEDIUM, LOW)
-- query_cve_by_number: Query specific CVE by its number
-- query_cve_by_cvss_range: Query CVEs within a CVSS score range
-- query_cve_by_keyword: Search CVEs by keywords
-- query_cve_by_product: Search CVEs affecting specific products
-- query_cve_with_exploit: Find CVEs with known exploits
-- query_cve_by_cisa_key: Find CVEs in CISA KEV catalog
-- get_cve_statistics: Get statistical summaries
-- query_cve_by_attack_type: Query by attack vector or complexity
-- query_recent_cves: Get recently published CVEs
-
-Always use the tools to get accurate data from the database."""
-
-            self.agent = ReActAgent(
-                tools=self.tools,
-                llm=llm,
-                verbose=True,
-                max_iterations=10,
-            )
-
-            logger.info("✓ Agent setup completed successfully!")
-
-        except Exception as e:
-            logger.error(f"Error setting up agent: {str(e)}")
-            raise
-        finally:
-            end_time = time.perf_counter()
-            logger.info(f"Setup completed in {end_time - start_time:.2f}s")
+            except Exception as e:
+                logger.error(f"Error setting up agent: {str(e)}")
+                raise
+            finally:
+                end_time = time.perf_counter()
+                logger.info(f"Setup completed in {end_time - start_time:.2f}s")
 
     async def process_query(self, user_query: str) -> str:
         """
@@ -290,95 +445,21 @@ Always use the tools to get accurate data from the database."""
 
         try:
             query_start = time.perf_counter()
-            logger.info(f"Processing query: {user_query}")
-
-            # Simple intelligent routing based on query patterns
-            query_lower = user_query.lower()
+            logger.info("Processing query: %s", user_query)
 
             # Route to appropriate tool based on query content
             result = None
+            route = route_query(user_query.lower())
+
+            if route:
+                tool_name, tool_kwargs = route
 
-            # Check for CVE number pattern (CVE-YYYY-NNNNN)
-            import re
-            cve_pattern = r'cve-\d{4}-\d{4,7}'
-            cve_match = re.search(cve_pattern, query_lower)
-
-            if cve_match:
-                cve_number = cve_match.group(0).upper()
-                logger.info(f"Detected CVE number: {cve_number}")
-                # Find and call the CVE number query tool
-                for tool in self.tools:
-                    if tool.metadata.name == "query_cve_by_number":
-                        logger.info(f"Calling tool: query_cve_by_number with cve_number={cve_number}")
-                        result = str(tool(cve_number=cve_number))
-                        break
-
-            elif "statistic" in query_lower or "summary" in query_lower or "overview" in query_lower:
-                logger.info("Detected statistics query")
-                for tool in self.tools:
-                    if tool.metadata.name == "get_cve_statistics":
-                        logger.info("Calling tool: get_cve_statistics")
-                        result = str(tool())
-                        break
-
-            elif "critical" in query_lower:
-                logger.info("Detected CRITICAL severity query")
-                limit = 5  # Default limit
-                for tool in self.tools:
-                    if tool.metadata.name == "query_cve_by_severity":
-                        logger.info(f"Calling tool: query_cve_by_severity with severity=CRITICAL, limit={limit}")
-                        result = str(tool(severity="CRITICAL", limit=limit))
-                        break
-
-            elif "high" in query_lower and "severity" in query_lower:
-                logger.info("Detected HIGH severity query")
-                limit = 5
-                for tool in self.tools:
-                    if tool.metadata.name == "query_cve_by_severity":
-                        logger.info(f"Calling tool: query_cve_by_severity with severity=HIGH, limit={limit}")
-                        result = str(tool(severity="HIGH", limit=limit))
-                        break
-
-            elif "exploit" in query_lower:
-                logger.info("Detected exploit query")
-                limit = 5
-                for tool in self.tools:
-                    if tool.metadata.name == "query_cve_with_exploit":
-                        logger.info(f"Calling tool: query_cve_with_exploit with limit={limit}")
-                        result = str(tool(limit=limit))
-                        break
-
-            elif "recent" in query_lower or "latest" in query_lower:
-                logger.info("Detected recent CVE query")
-                limit = 5
-                for tool in self.tools:
-                    if tool.metadata.name == "query_recent_cves":
-                        logger.info(f"Calling tool: query_recent_cves with limit={limit}")
-                        result = str(tool(limit=limit))
-                        break
-
-            elif "cisa" in query_lower or "kev" in query_lower:
-                logger.info("Detected CISA KEV query")
-                limit = 5
-                for tool in self.tools:
-                    if tool.metadata.name == "query_cve_by_cisa_key":
-                        logger.info(f"Calling tool: query_cve_by_cisa_key with limit={limit}")
-                        result = str(tool(limit=limit))
-                        break
-
-            else:
-                # Try keyword search as fallback
-                logger.info("Using keyword search as fallback")
-                # Extract potential keywords (simple approach)
-                keywords = [word for word in query_lower.split() if len(word) > 3 and word not in ['find', 'show', 'give', 'list', 'query', 'search', 'with', 'that', 'have']]
-                if keywords:
-                    keyword = keywords[0]
-                    logger.info(f"Searching with keyword: {keyword}")
-                    for tool in self.tools:
-                        if tool.metadata.name == "query_cve_by_keyword":
-                            logger.info(f"Calling tool: query_cve_by_keyword with keyword={keyword}, limit=5")
-                            result = str(tool(keyword=keyword, limit=5))
-                            break
+                # Paraphrases that resolve to the same tool call ("show critical CVEs",
+                # "list critical vulnerabilities") are served from tool_result_cache
+                tool = self._tools_by_name.get(tool_name)
+                if tool:
+                    logger.debug("Calling tool: %s with %s", tool_name, tool_kwargs)
+                    result = str(await tool.acall(**tool_kwargs))
 
             if not result:
                 result = "I couldn't determine which tool to use for your query. Please try:\n" \
@@ -389,7 +470,7 @@ Always use the tools to get accurate data from the database."""
                         "- Getting recent CVEs (e.g., 'Show recent CVEs')"
 
             query_end = time.perf_counter()
-            logger.info(f"Query processed in {query_end - query_start:.2f}s")
+            logger.info("Query processed in %.2fs", query_end - query_start)
 
             return result
 
@@ -400,8 +481,18 @@ Always use the tools to get accurate data from the database."""
                 "Please try again or contact support if the issue persists."
             )
 
+    async def __aenter__(self) -> "MCPClient":
+        await self.setup_agent()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.cleanup()
+
     async def cleanup(self):
         """Cleanup MCP connections."""
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._finalizer = None
         try:
             if self.exit_stack:
                 await self.exit_stack.aclose()
@@ -411,29 +502,3 @@ Always use the tools to get accurate data from the database."""
             # Silently ignore "Event loop is closed" errors during shutdown
             if "Event loop is closed" not in str(e) and "closed" not in str(e).lower():
                 logger.error(f"Error during cleanup: {str(e)}")
-
-    def __del__(self):
-        """Destructor to ensure cleanup - silently handles all errors."""
-        if self.exit_stack:
-            try:
-                loop = None
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = None
-                except (RuntimeError, AttributeError):
-                    loop = None
-
-                if loop is None:
-                    # Create a new loop only if we really need to
-                    try:
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(self.cleanup())
-                        loop.close()
-                    except Exception:
-                        # Silently ignore all cleanup errors
-                        pass
-            except Exception:
-                # Silently ignore all errors during destructor
-                pass
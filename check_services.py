@@ -3,6 +3,8 @@
 Quick test script to verify all services are working
 """
 
+import asyncio
+import functools
 import os
 import sys
 from dotenv import load_dotenv
@@ -11,43 +13,57 @@ load_dotenv()
 
 def check_mongodb():
     """Check MongoDB connection"""
+    lines = []
     try:
         from pymongo import MongoClient
         client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=2000)
         client.server_info()
-        print("✅ MongoDB: Connected successfully")
+        lines.append("✅ MongoDB: Connected successfully")
 
         # Check database
         db = client[os.getenv("MONGODB_DATABASE", "genai_kb")]
-        cve_count = db["cve_details"].count_documents({})
-        print(f"   📊 Found {cve_count} CVE documents in database")
-        return True
+        cve_count = db["cve_details"].estimated_document_count()
+        lines.append(f"   📊 Found {cve_count} CVE documents in database")
+        return True, lines
     except Exception as e:
-        print(f"❌ MongoDB: Failed to connect - {e}")
-        return False
+        lines.append(f"❌ MongoDB: Failed to connect - {e}")
+        return False, lines
+
+@functools.lru_cache(maxsize=1)
+def get_http_session():
+    """Shared HTTP session so repeated probes reuse keep-alive connections"""
+    import requests
+    return requests.Session()
 
 def check_ollama():
     """Check Ollama connection"""
+    lines = []
     try:
-        import requests
-        response = requests.get("http://localhost:11434/api/tags", timeout=2)
+        response = get_http_session().get("http://localhost:11434/api/tags", timeout=2)
         if response.status_code == 200:
             models = response.json().get("models", [])
-            print(f"✅ Ollama: Connected successfully")
-            print(f"   🤖 Available models: {', '.join([m['name'] for m in models]) if models else 'None'}")
+            lines.append(f"✅ Ollama: Connected successfully")
+            lines.append(f"   🤖 Available models: {', '.join([m['name'] for m in models]) if models else 'None'}")
 
             # Check if llama3.1 is available
             has_llama = any('llama3.1' in m['name'] for m in models)
             if not has_llama:
-                print(f"   ⚠️  Warning: llama3.1 model not found. Run: ollama pull llama3.1")
-            return True
+                lines.append(f"   ⚠️  Warning: llama3.1 model not found. Run: ollama pull llama3.1")
+            return True, lines
         else:
-            print(f"❌ Ollama: Unexpected response - {response.status_code}")
-            return False
+            lines.append(f"❌ Ollama: Unexpected response - {response.status_code}")
+            return False, lines
     except Exception as e:
-        print(f"❌ Ollama: Failed to connect - {e}")
-        print(f"   💡 Make sure Ollama is running: ollama serve")
-        return False
+        lines.append(f"❌ Ollama: Failed to connect - {e}")
+        lines.append(f"   💡 Make sure Ollama is running: ollama serve")
+        return False, lines
+
+async def run_checks():
+    """Run all service checks concurrently so timeouts overlap"""
+    return await asyncio.gather(
+        asyncio.to_thread(check_mongodb),
+        asyncio.to_thread(check_ollama),
+    )
 
 def main():
     print("=" * 60)
@@ -55,24 +71,26 @@ def main():
     print("=" * 60)
     print()
 
-    mongo_ok = check_mongodb()
-    print()
-    ollama_ok = check_ollama()
-    print()
+    (mongo_ok, mongo_lines), (ollama_ok, ollama_lines) = asyncio.run(run_checks())
 
-    if mongo_ok and ollama_ok:
-        print("🎉 All services are ready! You can start the application.")
-        print()
-        print("To run the Streamlit app:")
-        print("  ./run_app.sh")
-        print()
-        print("Or manually:")
-        print("  python -m streamlit run streamlit_app.py")
-        return 0
+    # Assemble the report and write it in one call
+    report = [*mongo_lines, "", *ollama_lines, ""]
+    all_ok = mongo_ok and ollama_ok
+    if all_ok:
+        report += [
+            "🎉 All services are ready! You can start the application.",
+            "",
+            "To run the Streamlit app:",
+            "  ./run_app.sh",
+            "",
+            "Or manually:",
+            "  python -m streamlit run streamlit_app.py",
+        ]
     else:
-        print("❌ Some services are not ready. Please fix the issues above.")
-        return 1
+        report.append("❌ Some services are not ready. Please fix the issues above.")
+
+    sys.stdout.write("\n".join(report) + "\n")
+    return 0 if all_ok else 1
 
 if __name__ == "__main__":
     sys.exit(main())
-
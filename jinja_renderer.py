@@ -3,10 +3,54 @@ Jinja2 Template Renderer for CVE Data
 Handles all template rendering logic separately from the main Streamlit app.
 """
 
+import bisect
+import functools
 import json
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from typing import Dict, Any
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+
+def _json_loads(text: str) -> Any:
+    """Parse JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_dumps_pretty(data: Any) -> str:
+    """Serialize data as indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
+SEVERITY_COLORS = {
+    "CRITICAL": "#dc2626",
+    "HIGH": "#ea580c",
+    "MEDIUM": "#f59e0b",
+    "LOW": "#84cc16",
+}
+DEFAULT_SEVERITY_COLOR = "#6b7280"
+
+# Lower bounds of the Medium, High and Critical CVSS bands
+CVSS_THRESHOLDS = (4.0, 7.0, 9.0)
+CVSS_COLORS = ("#84cc16", "#f59e0b", "#ea580c", "#dc2626")
+
+
+def get_severity_color(severity: str) -> str:
+    """Get color based on severity level."""
+    return SEVERITY_COLORS.get(severity, DEFAULT_SEVERITY_COLOR)
+
+
+def get_cvss_color(score: float) -> str:
+    """Get color based on CVSS score."""
+    return CVSS_COLORS[bisect.bisect_right(CVSS_THRESHOLDS, score)]
 
 
 class JinjaRenderer:
@@ -14,44 +58,30 @@ class JinjaRenderer:
 
     def __init__(self, template_dir='templates'):
         """Initialize the Jinja2 environment."""
+        # Templates ship with the app, so skip per-render mtime checks and
+        # keep compiled bytecode across processes
         self.env = Environment(
             loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(['html', 'xml'])
+            autoescape=select_autoescape(['html', 'xml']),
+            auto_reload=False,
+            bytecode_cache=FileSystemBytecodeCache(),
         )
 
         # Add custom filters
-        self.env.filters['format_severity_color'] = self.get_severity_color
-        self.env.filters['format_cvss_color'] = self.get_cvss_color
-
-    @staticmethod
-    def get_severity_color(severity: str) -> str:
-        """Get color based on severity level."""
-        colors = {
-            "CRITICAL": "#dc2626",
-            "HIGH": "#ea580c",
-            "MEDIUM": "#f59e0b",
-            "LOW": "#84cc16"
-        }
-        return colors.get(severity, "#6b7280")
-
-    @staticmethod
-    def get_cvss_color(score: float) -> str:
-        """Get color based on CVSS score."""
-        if score >= 9.0:
-            return "#dc2626"  # Critical
-        elif score >= 7.0:
-            return "#ea580c"  # High
-        elif score >= 4.0:
-            return "#f59e0b"  # Medium
-        else:
-            return "#84cc16"  # Low
+        self.env.filters['format_severity_color'] = get_severity_color
+        self.env.filters['format_cvss_color'] = get_cvss_color
+
+        # Load each template once instead of on every render
+        self._card_template = self.env.get_template('cve_card.html')
+        self._list_template = self.env.get_template('cve_list.html')
+        self._statistics_template = self.env.get_template('statistics.html')
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """Parse JSON response string."""
         try:
-            data = json.loads(response)
+            data = _json_loads(response)
             return data
-        except json.JSONDecodeError:
+        except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
             return {"type": "text", "content": response}
 
     def render_cve_card(self, cve_data: Dict[str, Any]) -> str:
@@ -59,34 +89,31 @@ class JinjaRenderer:
         Render a CVE card using the cve_card.html template.
 
         Args:
-            cve_data: Dictionary containing CVE information
+            cve_data: Dictionary containing CVE information (already parsed;
+                raw JSON strings go through render_response)
 
         Returns:
             Rendered HTML string
         """
         try:
-            # Parse JSON if string
-            if isinstance(cve_data, str):
-                cve_data = json.loads(cve_data)
-
-            template = self.env.get_template('cve_card.html')
-            rendered = template.render(cve=cve_data)
+            rendered = self._card_template.render(cve=cve_data)
             return rendered
 
         except Exception as e:
             return f"<div class='error-message'>Error formatting CVE data: {str(e)}</div>"
 
-    def render_response(self, response: str) -> str:
+    def render_response(self, response: Union[str, Dict[str, Any]]) -> str:
         """
         Render the agent response with appropriate template.
 
         Args:
-            response: The response string (JSON or text)
+            response: The response string (JSON or text), or data the caller
+                already parsed with parse_response
 
         Returns:
             Rendered HTML string
         """
-        data = self.parse_response(response)
+        data = self.parse_response(response) if isinstance(response, str) else response
 
         if isinstance(data, dict):
             # Single CVE
@@ -106,7 +133,7 @@ class JinjaRenderer:
                 return f"<div class='response-text'>{data['content']}</div>"
 
         # Fallback
-        return f'<pre style="background: #f3f4f6; padding: 15px; border-radius: 8px; overflow: auto;">{json.dumps(data, indent=2)}</pre>'
+        return f'<pre style="background: #f3f4f6; padding: 15px; border-radius: 8px; overflow: auto;">{_json_dumps_pretty(data)}</pre>'
 
     def render_multiple_cves(self, data: Dict[str, Any]) -> str:
         """
@@ -119,8 +146,7 @@ class JinjaRenderer:
             Combined HTML string of all CVE cards
         """
         try:
-            template = self.env.get_template('cve_list.html')
-            rendered = template.render(
+            rendered = self._list_template.render(
                 count=data.get('count', 0),
                 severity=data.get('severity', ''),
                 results=data.get('results', [])
@@ -128,10 +154,8 @@ class JinjaRenderer:
             return rendered
         except Exception as e:
             # Fallback to simple rendering
-            html = f'<h3>Found {data.get("count", 0)} CVEs</h3>'
-            for cve in data.get('results', []):
-                html += self.render_cve_card(cve)
-            return html
+            cards = [self.render_cve_card(cve) for cve in data.get('results', [])]
+            return f'<h3>Found {data.get("count", 0)} CVEs</h3>' + "".join(cards)
 
     def render_statistics(self, data: Dict[str, Any]) -> str:
         """
@@ -144,8 +168,13 @@ class JinjaRenderer:
             Rendered HTML string
         """
         try:
-            template = self.env.get_template('statistics.html')
-            rendered = template.render(stats=data)
+            rendered = self._statistics_template.render(stats=data)
             return rendered
         except Exception as e:
             return f"<div class='error-message'>Error formatting statistics: {str(e)}</div>"
+
+
+@functools.lru_cache(maxsize=1)
+def get_renderer(template_dir: str = 'templates') -> JinjaRenderer:
+    """Return the process-wide JinjaRenderer, building it on first use."""
+    return JinjaRenderer(template_dir)
@@ -11,14 +11,11 @@ Usage:
     python main.py --streamlit        # Run Streamlit web interface
 """
 
-import asyncio
 import sys
 import os
-import subprocess
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Heavier modules (asyncio, dotenv, the agent stack) are imported inside the
+# modes that need them so --help and --server start instantly
 
 
 def print_banner():
@@ -36,38 +33,84 @@ def print_banner():
     print()
 
 
+def run_event_loop(coro):
+    """Run a coroutine on uvloop when it is installed, else the stock asyncio loop."""
+    try:
+        import uvloop
+    except ImportError:
+        import asyncio
+        return asyncio.run(coro)
+    return uvloop.run(coro)
+
+
+async def ainput(prompt: str = "") -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+
+    Uses a daemon thread rather than the default executor so a pending
+    read never holds up interpreter shutdown on Ctrl+C.
+    """
+    import asyncio
+    import threading
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _deliver(setter, value):
+        if not future.done():
+            setter(value)
+
+    def _read():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            setter, value = future.set_exception, e
+        else:
+            setter, value = future.set_result, line
+        try:
+            loop.call_soon_threadsafe(_deliver, setter, value)
+        except RuntimeError:
+            # Event loop already closed; nobody is waiting for this line
+            pass
+
+    threading.Thread(target=_read, daemon=True).start()
+    return await future
+
+
 async def run_interactive_agent():
     """Run the agent in interactive mode."""
-    from agent import MCPClient
+    import asyncio
     import logging
+    from agent import MCPClient
 
+    # Quiet by default; set LOG_LEVEL=INFO or DEBUG to trace routing and tool calls
     logging.basicConfig(
-        level=logging.INFO,
+        level=os.getenv("LOG_LEVEL", "WARNING").upper(),
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
 
-    client = MCPClient()
     print("\n🤖 Starting interactive agent...")
     print("Type your CVE-related queries below.")
     print("Type 'quit' or 'exit' to stop.\n")
 
-    while True:
-        try:
-            user_input = input("\n🧑 You: ").strip()
-            if user_input.lower() in {"quit", "exit", "q"}:
-                print("\nGoodbye!")
+    async with MCPClient() as client:
+        while True:
+            try:
+                user_input = (await ainput("\n🧑 You: ")).strip()
+                if user_input.lower() in {"quit", "exit", "q"}:
+                    print("\nGoodbye!")
+                    break
+                if not user_input:
+                    continue
+
+                print("\n🤖 Agent: Processing your query...")
+                response = await client.process_query(user_input)
+                print(f"\n🤖 Agent: {response}")
+            except (KeyboardInterrupt, EOFError, asyncio.CancelledError):
+                print("\n\nGoodbye!")
                 break
-            if not user_input:
-                continue
-
-            print("\n🤖 Agent: Processing your query...")
-            response = await client.process_query(user_input)
-            print(f"\n🤖 Agent: {response}")
-        except KeyboardInterrupt:
-            print("\n\nGoodbye!")
-            break
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
 
 
 async def run_demo_queries():
@@ -83,35 +126,51 @@ async def run_demo_queries():
         "Search for CVEs related to 'Directory Traversal'",
     ]
 
-    client = MCPClient()
+    async with MCPClient() as client:
+        for i, query in enumerate(demo_queries, 1):
+            print(f"\n{'='*70}")
+            print(f"Demo Query {i}: {query}")
+            print('='*70)
 
-    for i, query in enumerate(demo_queries, 1):
-        print(f"\n{'='*70}")
-        print(f"Demo Query {i}: {query}")
-        print('='*70)
-
-        try:
-            response = await client.process_query(query)
-            print(f"\n✅ Response:\n{response}")
-        except Exception as e:
-            print(f"\n❌ Error: {str(e)}")
+            try:
+                response = await client.process_query(query)
+                print(f"\n✅ Response:\n{response}")
+            except Exception as e:
+                print(f"\n❌ Error: {str(e)}")
 
-        if i < len(demo_queries):
-            print("\n⏸️  Press Enter for next query...")
-            input()
+            if i < len(demo_queries):
+                print("\n⏸️  Press Enter for next query...")
+                await ainput()
 
 
 def run_mcp_server():
-    """Run the MCP server standalone."""
-    import subprocess
-
+    """Run the MCP server standalone, replacing this process."""
     print("\n🚀 Starting MCP Server...")
     print("The server will run in stdio mode for MCP communication.\n")
 
+    # exec discards unflushed buffers, so flush before handing over
+    sys.stdout.flush()
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server.py")
+    os.execv(sys.executable, [sys.executable, server_script])
+
+
+async def run_subprocess(*cmd: str) -> int:
+    """Run cmd as a child process, terminating it on Ctrl+C, and return its exit code."""
+    import asyncio
+    import signal
+
+    process = await asyncio.create_subprocess_exec(*cmd)
+    loop = asyncio.get_running_loop()
     try:
-        subprocess.run([sys.executable, "mcp_server.py"])
-    except KeyboardInterrupt:
-        print("\n\n✋ Server stopped by user")
+        loop.add_signal_handler(signal.SIGINT, process.terminate)
+    except NotImplementedError:
+        # Windows: Ctrl+C arrives as KeyboardInterrupt instead
+        return await process.wait()
+
+    try:
+        return await process.wait()
+    finally:
+        loop.remove_signal_handler(signal.SIGINT)
 
 
 def run_streamlit():
@@ -120,13 +179,17 @@ def run_streamlit():
     print("Opening in your default browser...\n")
 
     try:
-        subprocess.run([sys.executable, "-m", "streamlit", "run", "streamlit_app.py"])
+        run_event_loop(run_subprocess(sys.executable, "-m", "streamlit", "run", "streamlit_app.py"))
     except KeyboardInterrupt:
-        print("\n\n✋ Streamlit stopped by user")
+        pass
+    print("\n\n✋ Streamlit stopped")
 
 
 def check_environment():
-    """Check if required environment variables are set."""
+    """Load .env and check that required environment variables are set."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
     required_vars = ["LLM_API_KEY", "MONGODB_URI"]
     missing_vars = []
 
@@ -181,7 +244,7 @@ def main():
         elif arg == '--demo':
             if not check_environment():
                 sys.exit(1)
-            asyncio.run(run_demo_queries())
+            run_event_loop(run_demo_queries())
             return
 
         else:
@@ -193,7 +256,10 @@ def main():
     if not check_environment():
         sys.exit(1)
 
-    asyncio.run(run_interactive_agent())
+    try:
+        run_event_loop(run_interactive_agent())
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == '__main__':
@@ -3,7 +3,9 @@ MCP Server Configuration Manager
 Loads and manages multiple MCP server configurations from environment variables.
 """
 
+import functools
 import os
+from collections import defaultdict
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -30,25 +32,25 @@ class MCPConfig:
 
     def _load_servers(self):
         """Load all enabled MCP servers from environment variables."""
-        # Get all environment variables
-        env_vars = os.environ
-
-        # Find all MCP server prefixes
-        server_prefixes = set()
-        for key in env_vars.keys():
-            if key.startswith("MCP_") and key.endswith("_SERVER_ENABLED"):
-                # Extract server name (e.g., MCP_CVE_SERVER_ENABLED -> CVE)
-                prefix = key.replace("MCP_", "").replace("_SERVER_ENABLED", "")
-                server_prefixes.add(prefix)
+        # Bucket MCP_<NAME>_SERVER_<FIELD> variables by server in one pass
+        # (e.g., MCP_CVE_SERVER_ENABLED -> buckets["CVE"]["ENABLED"])
+        buckets: Dict[str, Dict[str, str]] = defaultdict(dict)
+        for key, value in os.environ.items():
+            if not key.startswith("MCP_"):
+                continue
+            # Keys without a name or field (e.g., MCP_SERVER_URL) are not server configs
+            prefix, _, field = key[4:].partition("_SERVER_")
+            if prefix and field:
+                buckets[prefix][field] = value
 
         # Load configuration for each enabled server
-        for prefix in server_prefixes:
-            enabled = os.getenv(f"MCP_{prefix}_SERVER_ENABLED", "false").lower() == "true"
+        for prefix, fields in buckets.items():
+            enabled = fields.get("ENABLED", "false").lower() == "true"
 
             if enabled:
-                command = os.getenv(f"MCP_{prefix}_SERVER_COMMAND", "python")
-                args_str = os.getenv(f"MCP_{prefix}_SERVER_ARGS", "")
-                description = os.getenv(f"MCP_{prefix}_SERVER_DESCRIPTION", "")
+                command = fields.get("COMMAND", "python")
+                args_str = fields.get("ARGS", "")
+                description = fields.get("DESCRIPTION", "")
 
                 # Parse args (support comma-separated or space-separated)
                 args = [arg.strip() for arg in args_str.split() if arg.strip()]
@@ -78,6 +80,15 @@ class MCPConfig:
         return len(self.servers) > 0
 
 
-# Global configuration instance
-mcp_config = MCPConfig()
+@functools.lru_cache(maxsize=1)
+def get_mcp_config() -> MCPConfig:
+    """Return the shared MCPConfig, scanning the environment on first use."""
+    return MCPConfig()
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from mcp_config import mcp_config` working without loading at import
+    if name == "mcp_config":
+        return get_mcp_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
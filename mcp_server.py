@@ -4,47 +4,191 @@ This server provides multiple tools using individual @app.tool() decorators
 for different types of CVE queries based on user requests.
 """
 
+import asyncio
+import atexit
+import functools
+import logging
 import os
 import json
-from typing import Any, Dict
+import re
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, TEXT, AsyncMongoClient
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware, MiddlewareContext
 from mcp.types import TextContent
 
+from cache import TTLCache
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
 # MongoDB connection
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "vulnerabilities")
+# zlib needs no extra packages; "zstd" or "snappy" require zstandard / python-snappy
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zlib")
+
+# Statistics only change when CVE data is ingested. This is the only result
+# cache in the server; the agent's tool_result_cache (TOOL_RESULT_CACHE_TTL)
+# sits in front of it, so statistics can be up to the sum of both TTLs old
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "300"))
+
+# Compact JSON on the wire; set MCP_PRETTY=1 for indented output when debugging
+MCP_PRETTY = os.getenv("MCP_PRETTY", "false").lower() in ("1", "true")
+
+# Optional JSON-lines file that receives per-tool call counts at shutdown
+MCP_TOOL_STATS_FILE = os.getenv("MCP_TOOL_STATS_FILE", "")
+
+
+@functools.cache
+def get_collection():
+    """
+    Return the CVE collection, creating the MongoDB client on first use.
+
+    The client (async, so tool calls don't block the server loop) is built
+    lazily so a forked child never inherits a parent's connection pool.
+    """
+    mongo_client = AsyncMongoClient(
+        MONGODB_URI,
+        maxPoolSize=50,
+        minPoolSize=5,
+        serverSelectionTimeoutMS=5000,
+        socketTimeoutMS=30000,
+        retryReads=True,
+        compressors=MONGODB_COMPRESSORS,
+    )
+    return mongo_client[MONGODB_DATABASE]["cve_details"]
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=get_collection.cache_clear)
+
+
+# Fields shown on a CVE card; list queries fetch only these
+PROJECTION = {
+    field: 1
+    for field in (
+        "cve_number", "cve_no", "cve_title", "description", "severity", "cvss_score",
+        "attack_vector", "attack_complexity", "privileges_required", "user_interaction",
+        "scope", "confidentiality_impact", "integrity_impact", "availability_impact",
+        "exploit_code_maturity", "remediation_level", "report_confidence",
+        "affected_products", "cisa_kev", "cisa_key", "source_last_modified_date",
+    )
+}
+
+# One round trip for every figure get_cve_statistics reports
+STATISTICS_PIPELINE = [
+    {
+        "$facet": {
+            "by_severity": [
+                {
+                    "$group": {
+                        "_id": "$severity",
+                        "count": {"$sum": 1},
+                        "avg_cvss": {"$avg": "$cvss_score"}
+                    }
+                }
+            ],
+            "total": [{"$count": "n"}],
+            "cisa_kev": [{"$match": {"cisa_key": "Yes"}}, {"$count": "n"}],
+            "with_exploits": [{"$match": {"classifications_exploit": "Exploit Exists"}}, {"$count": "n"}],
+        }
+    }
+]
+
+stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL)
+
+RECENT_INDEX = [("source_last_modified_date", DESCENDING)]
+
+# Indexes backing the tool filters, created in the background at startup
+CVE_INDEXES = [
+    ([("cve_number", ASCENDING)], {"unique": True}),
+    ([("severity", ASCENDING)], {}),
+    ([("cvss_score", ASCENDING)], {}),
+    ([("cisa_key", ASCENDING)], {}),
+    ([("classifications_exploit", ASCENDING)], {}),
+    (RECENT_INDEX, {}),
+    ([("cve_title", TEXT), ("description", TEXT), ("keywords", TEXT)], {"name": "cve_text"}),
+]
+
+
+async def ensure_indexes() -> None:
+    """Create the CVE indexes, skipping any the existing data rejects."""
+    for keys, options in CVE_INDEXES:
+        try:
+            await get_collection().create_index(keys, **options)
+        except Exception as e:
+            logger.warning(f"Could not create index on {keys}: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Build indexes without delaying the MCP handshake."""
+    index_task = asyncio.create_task(ensure_indexes())
+    try:
+        yield
+    finally:
+        index_task.cancel()
 
-# Initialize MongoDB client
-mongo_client = MongoClient(MONGODB_URI)
-db = mongo_client[MONGODB_DATABASE]
-cve_collection = db["cve_details"]
 
 # Initialize MCP Server with FastMCP
-app = FastMCP("cve-query-server")
-
-
-def serialize_mongo_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
-    """Convert MongoDB document to JSON-serializable format."""
-    if doc is None:
-        return {}
-
-    serialized = {}
-    for key, value in doc.items():
-        if key == "_id":
-            serialized[key] = str(value)
-        elif isinstance(value, datetime):
-            serialized[key] = value.isoformat()
-        elif isinstance(value, dict):
-            serialized[key] = serialize_mongo_doc(value)
-        else:
-            serialized[key] = value
-    return serialized
+app = FastMCP("cve-query-server", lifespan=lifespan)
+
+# Per-tool call frequency, used to decide which plans are worth templating
+tool_call_counts: Counter = Counter()
+
+
+class ToolCallCounter(Middleware):
+    """Count every tool invocation by name."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_call_counts[context.message.name] += 1
+        return await call_next(context)
+
+
+app.add_middleware(ToolCallCounter())
+
+
+@atexit.register
+def _report_tool_call_counts() -> None:
+    """Log the session's tool call counts and append them to MCP_TOOL_STATS_FILE."""
+    if not tool_call_counts:
+        return
+
+    logger.info(f"Tool call counts: {dict(tool_call_counts.most_common())}")
+    if MCP_TOOL_STATS_FILE:
+        record = {"timestamp": datetime.now().isoformat(), "counts": dict(tool_call_counts)}
+        with open(MCP_TOOL_STATS_FILE, "a", encoding="utf-8") as stats_file:
+            stats_file.write(json.dumps(record) + "\n")
+
+
+def _json_default(value: Any) -> Any:
+    """Encode BSON values (ObjectId, datetime) that JSON has no type for."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def to_json(data: Any) -> str:
+    """Serialize MongoDB documents to JSON in a single pass."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if MCP_PRETTY else None
+        return orjson.dumps(data, default=_json_default, option=option).decode()
+    if MCP_PRETTY:
+        return json.dumps(data, indent=2, default=_json_default)
+    return json.dumps(data, separators=(",", ":"), default=_json_default)
 
 
 # ============================================================================
@@ -63,13 +207,12 @@ async def query_cve_by_number(cve_number: str) -> list[TextContent]:
         Complete CVE information including severity, CVSS score, description, and remediation
     """
     try:
-        result = cve_collection.find_one({"cve_number": cve_number})
+        result = await get_collection().find_one({"cve_number": cve_number})
 
         if result:
-            serialized_result = serialize_mongo_doc(result)
             return [TextContent(
                 type="text",
-                text=json.dumps(serialized_result, indent=2)
+                text=to_json(result)
             )]
         else:
             return [TextContent(
@@ -96,18 +239,18 @@ async def query_cve_by_severity(severity: str, limit: int = 10) -> list[TextCont
         List of CVEs matching the specified severity level
     """
     try:
-        results = list(cve_collection.find(
-            {"severity": severity.upper()}
-        ).limit(limit))
+        results = await get_collection().find(
+            {"severity": severity.upper()},
+            PROJECTION
+        ).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "severity": severity,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -130,19 +273,18 @@ async def query_cve_by_cvss_range(min_score: float, max_score: float, limit: int
         CVEs within the specified CVSS score range
     """
     try:
-        results = list(cve_collection.find({
+        results = await get_collection().find({
             "cvss_score": {"$gte": min_score, "$lte": max_score}
-        }).limit(limit))
+        }, PROJECTION).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "min_score": min_score,
                 "max_score": max_score,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -164,23 +306,30 @@ async def query_cve_by_keyword(keyword: str, limit: int = 10) -> list[TextConten
         CVEs matching the search keyword
     """
     try:
-        # Search in multiple fields
-        results = list(cve_collection.find({
-            "$or": [
-                {"cve_title": {"$regex": keyword, "$options": "i"}},
-                {"description": {"$regex": keyword, "$options": "i"}},
-                {"keywords": {"$regex": keyword, "$options": "i"}}
-            ]
-        }).limit(limit))
-
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
+        # Ranked full-text search; falls back to a regex scan if the text
+        # index has not been built
+        try:
+            results = await get_collection().find(
+                {"$text": {"$search": keyword}},
+                {**PROJECTION, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit).batch_size(limit).to_list()
+        except OperationFailure:
+            # User text is matched literally, never as a pattern
+            results = await get_collection().find({
+                "$or": [
+                    {"cve_title": {"$regex": re.escape(keyword), "$options": "i"}},
+                    {"description": {"$regex": re.escape(keyword), "$options": "i"}},
+                    {"keywords": {"$regex": re.escape(keyword), "$options": "i"}}
+                ]
+            }, PROJECTION).limit(limit).batch_size(limit).to_list()
+
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "keyword": keyword,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -202,18 +351,17 @@ async def query_cve_by_product(product_name: str, limit: int = 10) -> list[TextC
         CVEs affecting the specified product
     """
     try:
-        results = list(cve_collection.find({
-            "affected_products": {"$regex": product_name, "$options": "i"}
-        }).limit(limit))
+        results = await get_collection().find({
+            "affected_products": {"$regex": re.escape(product_name), "$options": "i"}
+        }, PROJECTION).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "product": product_name,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -236,18 +384,17 @@ async def query_cve_with_exploit(exploit_exists: bool = True, limit: int = 10) -
     """
     try:
         query_value = "Exploit Exists" if exploit_exists else {"$ne": "Exploit Exists"}
-        results = list(cve_collection.find({
+        results = await get_collection().find({
             "classifications_exploit": query_value
-        }).limit(limit))
+        }, PROJECTION).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "exploit_exists": exploit_exists,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -268,17 +415,16 @@ async def query_cve_by_cisa_key(limit: int = 10) -> list[TextContent]:
         CVEs marked as CISA Known Exploited Vulnerabilities
     """
     try:
-        results = list(cve_collection.find({
+        results = await get_collection().find({
             "cisa_key": "Yes"
-        }).limit(limit))
+        }, PROJECTION).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
-                "results": serialized_results
-            }, indent=2)
+            text=to_json({
+                "count": len(results),
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -296,30 +442,29 @@ async def get_cve_statistics() -> list[TextContent]:
         Statistics including counts by severity, average CVSS scores, exploit counts, etc.
     """
     try:
-        # Aggregate statistics
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$severity",
-                    "count": {"$sum": 1},
-                    "avg_cvss": {"$avg": "$cvss_score"}
-                }
-            }
-        ]
+        cached = stats_cache.get("stats")
+        if cached is not None:
+            return [TextContent(type="text", text=cached)]
 
-        severity_stats = list(cve_collection.aggregate(pipeline))
-        total_count = cve_collection.count_documents({})
+        # $facet always yields exactly one document
+        cursor = await get_collection().aggregate(STATISTICS_PIPELINE)
+        facets = await cursor.next()
+
+        def facet_count(name: str) -> int:
+            return facets[name][0]["n"] if facets[name] else 0
 
         stats = {
-            "total_cves": total_count,
-            "by_severity": severity_stats,
-            "cisa_kev_count": cve_collection.count_documents({"cisa_key": "Yes"}),
-            "with_exploits": cve_collection.count_documents({"classifications_exploit": "Exploit Exists"})
+            "total_cves": facet_count("total"),
+            "by_severity": facets["by_severity"],
+            "cisa_kev_count": facet_count("cisa_kev"),
+            "with_exploits": facet_count("with_exploits")
         }
 
+        text = to_json(stats)
+        stats_cache.set("stats", text)
         return [TextContent(
             type="text",
-            text=json.dumps(stats, indent=2, default=str)
+            text=text
         )]
     except Exception as e:
         return [TextContent(
@@ -341,18 +486,17 @@ async def query_cve_by_attack_type(attack_type: str, limit: int = 10) -> list[Te
         CVEs with the specified attack type
     """
     try:
-        results = list(cve_collection.find({
-            "classifications_attack_type": {"$regex": attack_type, "$options": "i"}
-        }).limit(limit))
+        results = await get_collection().find({
+            "classifications_attack_type": {"$regex": re.escape(attack_type), "$options": "i"}
+        }, PROJECTION).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "attack_type": attack_type,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -378,18 +522,26 @@ async def query_recent_cves(days: int = 30, limit: int = 20) -> list[TextContent
 
         cutoff_date = datetime.now() - timedelta(days=days)
 
-        results = list(cve_collection.find({
-            "source_last_modified_date": {"$gte": cutoff_date}
-        }).sort("source_last_modified_date", -1).limit(limit))
+        recent_filter = {"source_last_modified_date": {"$gte": cutoff_date}}
+
+        # Walk the date index newest-first and stop at limit instead of
+        # sorting in memory; plain sort until the startup index build lands
+        try:
+            results = await get_collection().find(
+                recent_filter, PROJECTION
+            ).sort("source_last_modified_date", DESCENDING).hint(RECENT_INDEX).limit(limit).batch_size(limit).to_list()
+        except OperationFailure:
+            results = await get_collection().find(
+                recent_filter, PROJECTION
+            ).sort("source_last_modified_date", DESCENDING).limit(limit).batch_size(limit).to_list()
 
-        serialized_results = [serialize_mongo_doc(doc) for doc in results]
         return [TextContent(
             type="text",
-            text=json.dumps({
-                "count": len(serialized_results),
+            text=to_json({
+                "count": len(results),
                 "days_back": days,
-                "results": serialized_results
-            }, indent=2)
+                "results": results
+            })
         )]
     except Exception as e:
         return [TextContent(
@@ -18,6 +18,12 @@ Always query first, explain later. Accept any CVE format the user provides."""
 CONCISE_SYSTEM_PROMPT = """You are a CVE analyst. Query the database using available tools and present results clearly."""
 
 
+_PROMPTS = {
+    "default": DEFAULT_SYSTEM_PROMPT,
+    "concise": CONCISE_SYSTEM_PROMPT
+}
+
+
 def get_system_prompt(prompt_type: str = "default") -> str:
     """
     Get system prompt by type.
@@ -28,9 +34,4 @@ def get_system_prompt(prompt_type: str = "default") -> str:
     Returns:
         System prompt string
     """
-    prompts = {
-        "default": DEFAULT_SYSTEM_PROMPT,
-        "concise": CONCISE_SYSTEM_PROMPT
-    }
-
-    return prompts.get(prompt_type, DEFAULT_SYSTEM_PROMPT)
\ No newline at end of file
+    return _PROMPTS.get(prompt_type, DEFAULT_SYSTEM_PROMPT)
\ No newline at end of file
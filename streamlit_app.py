@@ -5,21 +5,21 @@ Streamlit Web Interface for CVE Query Agent
 import streamlit as st
 import asyncio
 import os
-from agent import MCPClient
+import threading
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from jinja_renderer import JinjaRenderer
+from jinja_renderer import get_renderer
 from styles import get_custom_css
 from prompts import get_system_prompt
 import logging
 
+if TYPE_CHECKING:
+    from agent import MCPClient
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Apply nest_asyncio to allow nested event loops in Streamlit
-import nest_asyncio
-nest_asyncio.apply()
-
 # Load environment variables
 load_dotenv()
 
@@ -31,56 +31,59 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize Jinja2 Renderer
-renderer = JinjaRenderer()
+# Shared Jinja2 renderer (built once per process, not per rerun)
+renderer = get_renderer()
 
 # Apply custom CSS
-st.markdown(get_custom_css(), unsafe_allow_html=True)
+st.html(get_custom_css())
 
 
-# Initialize session state for MCPClient
-if 'mcp_client' not in st.session_state:
-    st.session_state.mcp_client = None
-if 'agent_ready' not in st.session_state:
-    st.session_state.agent_ready = False
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start one event loop on a daemon thread for the lifetime of the server.
+
+    The MCP session, its stdio streams and the HTTP pools all belong to this
+    loop, so they stay alive across reruns instead of dying with a per-run loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="mcp-event-loop", daemon=True).start()
+    return loop
 
 
 def run_async(coro):
-    """Helper function to run async code in Streamlit."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    if loop.is_running():
-        # If loop is already running (Streamlit context), use nest_asyncio
-        return loop.run_until_complete(coro)
-    else:
-        return asyncio.run(coro)
-
-
-async def initialize_agent():
-    """Initialize the MCP agent if not already initialized."""
-    if st.session_state.mcp_client is None or not st.session_state.agent_ready:
-        try:
-            logger.info("Initializing MCP Client...")
-            client = MCPClient()
-            await client.setup_agent()
-            st.session_state.mcp_client = client
-            st.session_state.agent_ready = True
-            logger.info("✓ MCP Client initialized successfully")
-            return client
-        except Exception as e:
-            logger.error(f"Failed to initialize agent: {e}")
-            raise
-    return st.session_state.mcp_client
-
-
-async def process_query_async(query: str):
+    """Run a coroutine on the shared background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+@st.cache_resource(show_spinner=False)
+def get_mcp_client(model_name: str, model_endpoint: str) -> "MCPClient":
+    """
+    Build one MCPClient per model/endpoint, shared by every session and rerun.
+
+    The MCP server subprocess and its tool registry are created once here
+    instead of per browser session.
+    """
+    # Deferred so the LLM/MCP stack loads on first query, not before first paint
+    from agent import MCPClient
+
+    logger.info("Initializing MCP Client...")
+    client = MCPClient()
+    run_async(client.setup_agent())
+    logger.info("✓ MCP Client initialized successfully")
+    return client
+
+
+def get_shared_client() -> "MCPClient":
+    """Return the cached MCPClient for the configured model."""
+    from agent import LLM_MODEL_ENDPOINT, LLM_MODEL_NAME
+
+    return get_mcp_client(LLM_MODEL_NAME, LLM_MODEL_ENDPOINT)
+
+
+async def process_query_async(client: "MCPClient", query: str):
     """Process a query using the MCP client."""
     try:
-        client = await initialize_agent()
         response = await client.process_query(query)
         return response
     except Exception as e:
@@ -88,6 +91,53 @@ async def process_query_async(query: str):
         raise
 
 
+@st.fragment
+def prompt_preview(prompt_type: str):
+    """Show the selected system prompt; reruns on its own, not the whole page."""
+    with st.expander("📝 View System Prompt"):
+        st.text_area(
+            "Current System Prompt",
+            get_system_prompt(prompt_type),
+            height=200,
+            disabled=True,
+            key=f"system_prompt_{prompt_type}"
+        )
+
+
+@st.fragment
+def render_result(response: str):
+    """Render a query response; reruns on its own, not the whole page."""
+    # Display results
+    st.success("✅ Query completed!")
+    st.divider()
+
+    # Render the response using Jinja2 templates
+    st.subheader("🤖 AI Analysis")
+
+    # Parse once; the renderer and the raw view share the result
+    response_data = renderer.parse_response(response)
+
+    try:
+        # Use the renderer to create beautiful HTML from JSON response
+        rendered_html = renderer.render_response(response_data)
+
+        # Render in the host page rather than a fixed-height iframe
+        st.html(rendered_html)
+
+    except Exception as render_error:
+        logger.warning(f"Failed to render with template: {render_error}")
+        logger.exception(render_error)
+        # Fallback to displaying as markdown if rendering fails
+        st.markdown(response)
+
+    # Show raw response in expander
+    with st.expander("🔍 View Raw Response"):
+        if isinstance(response_data, dict) and response_data.get("type") == "text":
+            st.code(response)
+        else:
+            st.json(response_data, expanded=False)
+
+
 def main():
     """Main Streamlit application."""
 
@@ -129,13 +179,7 @@ def main():
         )
 
         # Show selected prompt preview
-        with st.expander("📝 View System Prompt"):
-            st.text_area(
-                "Current System Prompt",
-                get_system_prompt(prompt_type),
-                height=200,
-                disabled=True
-            )
+        prompt_preview(prompt_type)
 
         st.divider()
 
@@ -150,40 +194,16 @@ def main():
 
         st.divider()
 
-        # Connection status
-        if os.getenv("LLM_BASE_URL"):
-            st.success("✅ LLM endpoint configured")
-        else:
-            st.warning("⚠️ LLM endpoint not set")
-
-        if os.getenv("MONGODB_URI"):
-            st.success("✅ MongoDB configured")
-        else:
-            st.error("❌ MongoDB URI missing")
-
-        # Model info
-        st.divider()
-        st.caption(f"🤖 Model: {os.getenv('LLM_MODEL_NAME', 'llama3.1')}")
-        if os.getenv('LLM_BASE_URL') and os.getenv('LLM_BASE_URL') != "https://api.openai.com/v1":
-            st.caption(f"🔗 Custom endpoint: {os.getenv('LLM_BASE_URL')}")
-
-        # Agent status
-        if st.session_state.agent_ready:
-            if st.session_state.mcp_client:
-                tools_count = len(st.session_state.mcp_client.tools)
-                st.success(f"✅ Agent ready ({tools_count} tools)")
-        else:
-            st.info("🔄 Agent will initialize on first query")
-
-        # Add a button to manually initialize
-        if st.button("🚀 Initialize Agent Now"):
-            with st.spinner("Initializing agent..."):
-                try:
-                    run_async(initialize_agent())
-                    st.success("✅ Agent initialized!")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"❌ Failed to initialize: {str(e)}")
+        # Connection status and model info in one element
+        llm_base_url = os.getenv("LLM_BASE_URL")
+        status_lines = [
+            "✅ LLM endpoint configured" if llm_base_url else "⚠️ LLM endpoint not set",
+            "✅ MongoDB configured" if os.getenv("MONGODB_URI") else "❌ MongoDB URI missing",
+            f"🤖 Model: {os.getenv('LLM_MODEL_NAME', 'llama3.1')}",
+        ]
+        if llm_base_url and llm_base_url != "https://api.openai.com/v1":
+            status_lines.append(f"🔗 Custom endpoint: {llm_base_url}")
+        st.markdown("  \n".join(status_lines))
 
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -219,93 +239,73 @@ def main():
             <h3 style="color: #667eea; margin: 0;">10</h3>
             <p style="margin: 0;">CVE Query Tools</p>
         </div>
-        """, unsafe_allow_html=True)
-
-        st.markdown("<br>", unsafe_allow_html=True)
-
-        st.markdown("""
+        <br>
         <div class="stat-card">
             <h3 style="color: #764ba2; margin: 0;">Ollama</h3>
             <p style="margin: 0;">Powered by Llama 3.1</p>
         </div>
         """, unsafe_allow_html=True)
 
-    # Process query
+    # Process query; the result is kept in session state so reruns triggered
+    # by other widgets redraw it instead of re-running the query
     if submit_button and user_query:
-        with st.spinner("🔄 Processing your query..."):
-            try:
-                # Process the query using our helper function
-                response = run_async(process_query_async(user_query))
+        last_result = st.session_state.get("last_result")
+        if last_result is None or last_result[:2] != (user_query, prompt_type):
+            with st.spinner("🔄 Processing your query..."):
+                try:
+                    # Process the query using the shared client
+                    client = get_shared_client()
+                    response = run_async(process_query_async(client, user_query))
+                    st.session_state.last_result = (user_query, prompt_type, response)
 
-                # Display results
-                st.success("✅ Query completed!")
-                st.divider()
+                except Exception as e:
+                    st.session_state.pop("last_result", None)
+                    st.error(f"❌ Error: {str(e)}")
+                    logger.exception("Query processing failed")
 
-                # Render the response using Jinja2 templates
-                st.subheader("🤖 AI Analysis")
+                    # Show helpful error message
+                    st.info("""
+                    **Troubleshooting tips:**
+                    - Make sure MongoDB is running
+                    - Check that Ollama is running: `ollama serve`
+                    - Verify your .env configuration
+                    """)
 
-                try:
-                    # Use the renderer to create beautiful HTML from JSON response
-                    rendered_html = renderer.render_response(response)
-
-                    # Use st.html() for better HTML rendering (Streamlit 1.30+)
-                    # or use components.html() for older versions
-                    import streamlit.components.v1 as components
-                    components.html(rendered_html, height=800, scrolling=True)
-
-                except Exception as render_error:
-                    logger.warning(f"Failed to render with template: {render_error}")
-                    logger.exception(render_error)
-                    # Fallback to displaying as markdown if rendering fails
-                    st.markdown(response)
-
-                # Show raw response in expander
-                with st.expander("🔍 View Raw Response"):
-                    st.code(response, language="json")
-
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
-                logger.exception("Query processing failed")
-
-                # Show helpful error message
-                st.info("""
-                **Troubleshooting tips:**
-                - Make sure MongoDB is running
-                - Check that Ollama is running: `ollama serve`
-                - Verify your .env configuration
-                - Try reinitializing the agent using the sidebar button
-                """)
+    if "last_result" in st.session_state:
+        render_result(st.session_state.last_result[2])
 
     # Example queries section
     st.divider()
     st.header("💡 Example Queries")
 
-    examples_col1, examples_col2, examples_col3 = st.columns(3)
-
-    with examples_col1:
-        st.markdown("""
-        **By Severity:**
-        - Show me critical CVEs
-        - Find high severity vulnerabilities
-        - List medium severity CVEs
-        """)
-
-    with examples_col2:
-        st.markdown("""
-        **By Properties:**
-        - CVEs with CVSS score > 9
-        - Find CVEs with known exploits
-        - Show CISA KEV vulnerabilities
-        """)
-
-    with examples_col3:
-        st.markdown("""
-        **By Search:**
-        - Find CVE-2020-000001
-        - Search for Buffer Overflow
-        - Show Red Hat CVEs
-        """)
-
+    st.markdown("""
+    <div class="examples-grid">
+        <div>
+            <strong>By Severity:</strong>
+            <ul>
+                <li>Show me critical CVEs</li>
+                <li>Find high severity vulnerabilities</li>
+                <li>List medium severity CVEs</li>
+            </ul>
+        </div>
+        <div>
+            <strong>By Properties:</strong>
+            <ul>
+                <li>CVEs with CVSS score &gt; 9</li>
+                <li>Find CVEs with known exploits</li>
+                <li>Show CISA KEV vulnerabilities</li>
+            </ul>
+        </div>
+        <div>
+            <strong>By Search:</strong>
+            <ul>
+                <li>Find CVE-2020-000001</li>
+                <li>Search for Buffer Overflow</li>
+                <li>Show Red Hat CVEs</li>
+            </ul>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
@@ -4,10 +4,9 @@ Centralized styling for better maintainability.
 """
 
 
-def get_custom_css():
-    """Return all custom CSS styles as a string."""
-    return """
-    <style>
+import re
+
+_CSS_SOURCE = """
         /* Main Header Styles */
         .main-header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -40,6 +39,13 @@ def get_custom_css():
             border-left: 5px solid #667eea;
         }
         
+        /* Example Queries Grid */
+        .examples-grid {
+            display: grid;
+            grid-template-columns: repeat(3, 1fr);
+            gap: 1rem;
+        }
+
         /* CVE Card Styles */
         .cve-card {
             background: white;
@@ -218,6 +224,22 @@ def get_custom_css():
             white-space: pre-wrap;
             word-wrap: break-word;
         }
-    </style>
-    """
+"""
 
+
+def _minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+# Minified once at import; Streamlit reruns resend the same compact string
+CUSTOM_CSS = "<style>" + _minify_css(_CSS_SOURCE) + "</style>"
+
+
+def get_custom_css():
+    """Return all custom CSS styles as a string."""
+    return CUSTOM_CSS
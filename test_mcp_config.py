@@ -0,0 +1,37 @@
+"""
+Regression tests for MCP server configuration loading
+
+Usage:
+    python -m unittest test_mcp_config
+"""
+import os
+import unittest
+from unittest import mock
+
+from mcp_config import MCPConfig
+
+
+class MCPConfigLoadTest(unittest.TestCase):
+
+    def test_ignores_keys_without_server_name(self):
+        env = {
+            'MCP_SERVER_URL': 'http://x',
+            'MCP_CVE_SERVER_ENABLED': 'true',
+            'MCP_CVE_SERVER_ARGS': 'mcp_server.py',
+        }
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = MCPConfig()
+
+        self.assertEqual(list(config.servers), ['cve'])
+        self.assertEqual(config.get_server('cve').args, ['mcp_server.py'])
+
+    def test_ignores_keys_without_field(self):
+        env = {'MCP_CVE_SERVER_': 'x', 'MCP_CVE_SERVER_ENABLED': 'true'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = MCPConfig()
+
+        self.assertEqual(list(config.servers), ['cve'])
+
+
+if __name__ == '__main__':
+    unittest.main()